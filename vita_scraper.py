@@ -4,13 +4,29 @@ import json
 import random
 import hashlib
 import hmac
+import struct
+import threading
 import requests
+from requests.adapters import HTTPAdapter
 import pandas as pd
 from pathlib import Path
+from dataclasses import dataclass, field
 from urllib.parse import urlparse
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import xml.etree.ElementTree as ET
 import csv
+import argparse
+import sys
+import queue
+import atexit
+import logging
+import logging.handlers
+import io
+import copy
+import cProfile
+import pstats
+import functools
+from contextlib import contextmanager
 
 # Import Selenium
 try:
@@ -27,6 +43,353 @@ except ImportError:
 
 requests.packages.urllib3.disable_warnings()
 
+logger = logging.getLogger('vita_scraper')
+
+class JsonLinesFormatter(logging.Formatter):
+    """One JSON object per log record"""
+
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        # Traceback préparé par JsonQueueHandler (exc_info ne traverse pas la queue)
+        exc = getattr(record, 'exc', None)
+        if exc:
+            entry['exc'] = exc
+        return json.dumps(entry, ensure_ascii=False)
+
+class JsonQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that keeps the traceback apart from the message"""
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.exc = logging.Formatter().formatException(record.exc_info) if record.exc_info else None
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        record.exc_text = None
+        return record
+
+class ProgressLine:
+    """Single refreshing progress line (stderr, TTY only)"""
+
+    current = None
+
+    def __init__(self, total, label, min_interval=0.2, stream=None):
+        self.total = total
+        self.label = label
+        self.min_interval = min_interval
+        self.stream = stream or sys.stderr
+        # Suivre le niveau de la console (pas du logger, abaissé par --log-file)
+        console = next((h for h in logger.handlers if isinstance(h, ConsoleHandler)), None)
+        self.enabled = self.stream.isatty() and console is not None and console.level <= logging.INFO
+        self.start_time = time.time()
+        self.last_draw = 0
+        self.text = ''
+        ProgressLine.current = self
+
+    def update(self, done, suffix=''):
+        """Refresh the line (throttled to min_interval)"""
+        now = time.time()
+        if not self.enabled or (now - self.last_draw < self.min_interval and done < self.total):
+            return
+        elapsed = now - self.start_time
+        remaining = elapsed / done * (self.total - done) if done else 0
+        progress = (done / self.total) * 100 if self.total else 100
+        self.text = f"📄 {self.label} [{done}/{self.total}] ({progress:.1f}%) - ETA: {remaining/60:.1f} min {suffix}"
+        self.last_draw = now
+        self.redraw()
+
+    def redraw(self):
+        if self.enabled and self.text:
+            self.stream.write('\r' + self.text + '\033[K')
+            self.stream.flush()
+
+    def clear(self):
+        if self.enabled and self.text:
+            self.stream.write('\r\033[K')
+            self.stream.flush()
+
+    def close(self):
+        """Leave the last state on screen and release the line"""
+        if self.enabled and self.text:
+            self.stream.write('\n')
+            self.stream.flush()
+        ProgressLine.current = None
+
+class ConsoleHandler(logging.StreamHandler):
+    """Console handler that keeps the progress line at the bottom"""
+
+    def emit(self, record):
+        progress = ProgressLine.current
+        if progress:
+            progress.clear()
+        super().emit(record)
+        if progress:
+            progress.redraw()
+
+def setup_logging(verbose=False, quiet=False, log_file=None):
+    """Configure console logging and the optional JSON-lines log file"""
+    logger.handlers.clear()
+    logger.propagate = False
+
+    console_level = logging.WARNING if quiet else (logging.DEBUG if verbose else logging.INFO)
+    file_level = logging.DEBUG if verbose else logging.INFO
+    logger.setLevel(min(console_level, file_level) if log_file else console_level)
+
+    console = ConsoleHandler(sys.stdout)
+    console.setLevel(console_level)
+    console.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(console)
+
+    if not log_file:
+        return None
+
+    # Écriture du fichier dans un thread dédié, la boucle ne fait que pousser dans la queue
+    file_handler = logging.FileHandler(log_file, encoding='utf-8')
+    file_handler.setLevel(file_level)
+    file_handler.setFormatter(JsonLinesFormatter())
+
+    log_queue = queue.SimpleQueue()
+    logger.addHandler(JsonQueueHandler(log_queue))
+    listener = logging.handlers.QueueListener(log_queue, file_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
+class StageProfiler:
+    """cProfile + stack sampling around named stages (--profile)"""
+
+    active = None
+
+    def __init__(self, output_dir='psvita_profile', interval=0.005, top_n=25):
+        self.output_dir = Path(output_dir)
+        self.interval = interval
+        self.top_n = top_n
+        self.profile = cProfile.Profile()
+        self.stage_stacks = {}
+        self.stage_times = {}
+        self.samples = {}
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.sampler = threading.Thread(target=self.sample_loop, name='stage-sampler', daemon=True)
+
+    def start(self):
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        StageProfiler.active = self
+        self.sampler.start()
+        self.profile.enable()
+        return self
+
+    @contextmanager
+    def stage(self, name):
+        """Time a named stage and tag samples taken while it runs"""
+        stack = self.stage_stacks.setdefault(threading.get_ident(), [])
+        stack.append(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            stack.pop()
+            with self.lock:
+                count, total = self.stage_times.get(name, (0, 0.0))
+                self.stage_times[name] = (count + 1, total + elapsed)
+
+    def frame_label(self, frame):
+        code = frame.f_code
+        return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(';', ',')
+
+    def sample_loop(self):
+        """Record stacks of the main thread and of threads inside a stage (collapsed format)"""
+        main_ident = threading.main_thread().ident
+        while not self.stop_event.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                # Ignorer les threads inactifs (QueueListener, workers en attente sur leur queue)
+                if ident != main_ident and not self.stage_stacks.get(ident):
+                    continue
+                frames = []
+                while frame is not None:
+                    frames.append(self.frame_label(frame))
+                    frame = frame.f_back
+                stages = [f"stage:{name}" for name in self.stage_stacks.get(ident, [])]
+                key = ';'.join(stages + frames[::-1])
+                self.samples[key] = self.samples.get(key, 0) + 1
+
+    def stop(self):
+        """Stop profiling, write pstats/collapsed stacks and print the report"""
+        self.profile.disable()
+        self.stop_event.set()
+        self.sampler.join()
+        StageProfiler.active = None
+
+        pstats_file = self.output_dir / 'profile.pstats'
+        collapsed_file = self.output_dir / 'profile.collapsed'
+        self.profile.dump_stats(str(pstats_file))
+        with open(collapsed_file, 'w', encoding='utf-8') as f:
+            for stack, count in sorted(self.samples.items()):
+                f.write(f"{stack} {count}\n")
+
+        # Rapport demandé explicitement par --profile: écrit directement, même avec -q
+        lines = ["=" * 60, "⏱️ STAGE PROFILE:"]
+        for name, (count, total) in sorted(self.stage_times.items(), key=lambda item: -item[1][1]):
+            lines.append(f"   {name:<26} {count:>6} calls {total:>9.2f} s  ({total / count * 1000:.1f} ms/call)")
+
+        report = io.StringIO()
+        stats = pstats.Stats(self.profile, stream=report)
+        stats.sort_stats('tottime').print_stats(self.top_n)
+        lines.append(f"🔥 Top {self.top_n} functions (self time, main thread only - "
+                     f"worker threads appear in the collapsed stacks):\n{report.getvalue()}")
+        lines.append(f"💾 Profile saved to {pstats_file} and {collapsed_file} (flamegraph.pl / speedscope)")
+        lines.append("=" * 60)
+        print('\n'.join(lines), file=sys.stderr)
+
+def profiled_stage(name):
+    """Decorator: wrap a method in a named stage when --profile is on"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            profiler = StageProfiler.active
+            if profiler is None:
+                return func(*args, **kwargs)
+            with profiler.stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+TITLE_CSV_FIELDS = ['ID', 'Title', 'Region', 'Media_ID', 'Box_ID', 'Genre', 'Released']
+
+RESULT_CSV_FIELDS = ['Media_ID', 'Title', 'Region', 'Genre', 'Has_Updates', 'Status',
+                     'Updates_Count', 'XML_Updates', 'Direct_Updates', 'Total_Size_MB']
+
+UPDATE_CSV_FIELDS = ['Update_Version', 'Update_URL', 'Update_SHA1', 'Update_Size_MB',
+                     'Update_Filename', 'Update_Type']
+
+def intern_text(value, default=''):
+    """Interner les petites chaînes très répétées (région, genre, type...)"""
+    if value is None or value != value:  # None ou NaN
+        return default
+    return sys.intern(str(value).strip())
+
+@dataclass(slots=True)
+class TitleRecord:
+    """One PS Vita title from Renascene"""
+    id: str
+    title: str
+    region: str
+    media_id: str
+    box_id: str
+    genre: str
+    released: str
+
+    @classmethod
+    def from_row(cls, row):
+        """Build from a dict using the CSV column names"""
+        return cls(
+            id=str(row.get('ID', '')),
+            title=str(row.get('Title', 'Unknown')),
+            region=intern_text(row.get('Region'), 'Unknown'),
+            media_id=str(row.get('Media_ID', '')),
+            box_id=row.get('Box_ID') or '',
+            genre=intern_text(row.get('Genre'), 'Unknown'),
+            released=intern_text(row.get('Released'))
+        )
+
+    def to_row(self):
+        """Values in TITLE_CSV_FIELDS order"""
+        return (self.id, self.title, self.region, self.media_id, self.box_id, self.genre, self.released)
+
+    def to_dict(self):
+        return dict(zip(TITLE_CSV_FIELDS, self.to_row()))
+
+@dataclass(slots=True)
+class UpdatePackage:
+    """One update package (.pkg) for a title"""
+    version: str
+    url: str
+    sha1: str
+    size: int
+    filename: str
+    type: str
+    hash: str = ''
+    t_variant: str = ''
+    pkg_header: dict = None
+
+    def to_dict(self):
+        data = {
+            'version': self.version,
+            'url': self.url,
+            'sha1': self.sha1,
+            'size': self.size,
+            'filename': self.filename,
+            'type': self.type
+        }
+        if self.hash:
+            data['hash'] = self.hash
+            data['t_variant'] = self.t_variant
+        if self.pkg_header is not None:
+            data['pkg_header'] = self.pkg_header
+        return data
+
+@dataclass(slots=True)
+class TitleResult:
+    """Update lookup result for one title"""
+    media_id: str
+    title_name: str
+    region: str
+    genre: str
+    has_updates: bool
+    status: str
+    updates: list = field(default_factory=list)
+    error: str = ''
+
+    @property
+    def updates_count(self):
+        return len(self.updates)
+
+    @property
+    def xml_updates_count(self):
+        return sum(1 for u in self.updates if u.type == 'XML Standard')
+
+    @property
+    def direct_updates_count(self):
+        return sum(1 for u in self.updates if u.type == 'Direct Discovery')
+
+    @property
+    def total_size_bytes(self):
+        return sum(u.size for u in self.updates)
+
+    def to_dict(self):
+        """Same layout as the historical JSON output"""
+        data = {
+            'media_id': self.media_id,
+            'title_name': self.title_name,
+            'region': self.region,
+            'genre': self.genre,
+            'has_updates': self.has_updates
+        }
+        if self.has_updates:
+            data.update({
+                'updates_count': self.updates_count,
+                'xml_updates_count': self.xml_updates_count,
+                'direct_updates_count': self.direct_updates_count,
+                'total_size_bytes': self.total_size_bytes,
+                'updates': [u.to_dict() for u in self.updates]
+            })
+        data['status'] = self.status
+        if self.error:
+            data['error'] = self.error
+        return data
+
+def load_titles_csv(csv_file='psvita_titles.csv'):
+    """Stream a titles CSV into TitleRecord objects"""
+    with open(csv_file, 'r', newline='', encoding='utf-8') as f:
+        return [TitleRecord.from_row(row) for row in csv.DictReader(f)]
+
 class PSVitaTitlesScraper:
     """PS Vita Titles scraper for Renascene.com"""
 
@@ -45,7 +408,7 @@ class PSVitaTitlesScraper:
     def setup_driver(self):
         """Setup Chrome driver"""
         if not SELENIUM_AVAILABLE:
-            print("❌ Selenium not available for scraping")
+            logger.error("❌ Selenium not available for scraping")
             return
 
         chrome_options = Options()
@@ -58,15 +421,16 @@ class PSVitaTitlesScraper:
 
         try:
             self.driver = webdriver.Chrome(options=chrome_options)
-            print("✅ Chrome driver initialized successfully")
+            logger.info("✅ Chrome driver initialized successfully")
         except Exception as e:
-            print(f"❌ Error setting up driver: {e}")
+            logger.error(f"❌ Error setting up driver: {e}")
             self.driver = None
 
+    @profiled_stage('scrape_page')
     def scrape_page(self, page_num):
         """Scraper une page de titres PS Vita sur Renascene"""
         if not self.driver:
-            print("❌ Chrome driver not available")
+            logger.error("❌ Chrome driver not available")
             return []
 
         url = f"{self.base_url}?target={self.params['target']}&sort={self.params['sort']}&ord={self.params['ord']}&gr={self.params['gr']}&page={page_num}"
@@ -74,7 +438,7 @@ class PSVitaTitlesScraper:
         max_retries = 3
         for attempt in range(max_retries):
             try:
-                print(f"🔗 Loading PS Vita page {page_num}...")
+                logger.debug("🔗 Loading PS Vita page %s...", page_num)
                 self.driver.get(url)
                 
                 # Attendre que la page se charge
@@ -83,9 +447,9 @@ class PSVitaTitlesScraper:
                 # Chercher la table avec l'ID "tabloid" (trouvé dans le HTML)
                 try:
                     table = self.driver.find_element(By.ID, "tabloid")
-                    print(f"    ✅ Found main table with ID 'tabloid'")
+                    logger.debug("    ✅ Found main table with ID 'tabloid'")
                 except:
-                    print(f"    ❌ Table with ID 'tabloid' not found")
+                    logger.error(f"    ❌ Table with ID 'tabloid' not found")
                     if attempt == max_retries - 1:
                         return []
                     time.sleep(5)
@@ -94,7 +458,7 @@ class PSVitaTitlesScraper:
                 rows = table.find_elements(By.TAG_NAME, "tr")
                 
                 if len(rows) <= 1:
-                    print(f"❌ No data rows in main table on page {page_num}")
+                    logger.error(f"❌ No data rows in main table on page {page_num}")
                     if attempt == max_retries - 1:
                         return []
                     time.sleep(5)
@@ -142,26 +506,25 @@ class PSVitaTitlesScraper:
                                 title = cells[2].text.strip()
                             
                             if title and media_id:
-                                game_data = {
-                                    'ID': game_id,
-                                    'Title': title,
-                                    'Region': region,
-                                    'Media_ID': media_id,
-                                    'Box_ID': box_id,
-                                    'Genre': genre,
-                                    'Released': released
-                                }
-                                page_games.append(game_data)
+                                page_games.append(TitleRecord(
+                                    id=game_id,
+                                    title=title,
+                                    region=sys.intern(region),
+                                    media_id=media_id,
+                                    box_id=box_id,
+                                    genre=sys.intern(genre),
+                                    released=sys.intern(released)
+                                ))
                                 
                     except Exception as e:
-                        print(f"⚠️ Error parsing row {row_idx}: {e}")
+                        logger.warning(f"⚠️ Error parsing row {row_idx}: {e}")
                         continue
                         
-                print(f"✅ PS Vita Page {page_num}: {len(page_games)} titles found")
+                logger.debug("✅ PS Vita Page %s: %d titles found", page_num, len(page_games))
                 return page_games
                 
             except Exception as e:
-                print(f"❌ Attempt {attempt + 1} failed for page {page_num}: {e}")
+                logger.error(f"❌ Attempt {attempt + 1} failed for page {page_num}: {e}")
                 if attempt == max_retries - 1:
                     return []
                 time.sleep(random.uniform(3, 6))
@@ -178,39 +541,33 @@ class PSVitaTitlesScraper:
             try:
                 with open('psvita_titles_progress.json', 'r', encoding='utf-8') as f:
                     progress_data = json.load(f)
-                    self.games_data = progress_data.get('games_data', [])
-                    print(f"📂 Loaded {len(self.games_data)} existing titles")
+                    self.games_data = [TitleRecord.from_row(g) for g in progress_data.get('games_data', [])]
+                    logger.info(f"📂 Loaded {len(self.games_data)} existing titles")
             except FileNotFoundError:
-                print("⚠️ No previous progress found, starting fresh")
+                logger.warning("⚠️ No previous progress found, starting fresh")
 
         consecutive_empty_pages = 0
 
-        print(f"🚀 Starting to scrape PS Vita titles pages {start_page} to {max_pages}")
-        print(f"🎯 Expected total: ~3,000+ PS Vita titles from Renascene")
-        print("=" * 60)
+        logger.info(f"🚀 Starting to scrape PS Vita titles pages {start_page} to {max_pages}")
+        logger.info(f"🎯 Expected total: ~3,000+ PS Vita titles from Renascene")
+        logger.info("=" * 60)
 
-        start_time = time.time()
+        progress = ProgressLine(max_pages - start_page + 1, 'Pages')
 
         for page in range(start_page, max_pages + 1):
-            progress = ((page - start_page + 1) / (max_pages - start_page + 1)) * 100
-            elapsed = time.time() - start_time
-            estimated_total = elapsed / (page - start_page + 1) * (max_pages - start_page + 1) if page > start_page else 0
-            remaining = estimated_total - elapsed if page > start_page else 0
-
-            print(f"\n📄 Page {page}/{max_pages} ({progress:.1f}%) - ETA: {remaining/60:.1f} min")
-
             page_data = self.scrape_page(page)
+            progress.update(page - start_page + 1, f"- {len(self.games_data) + len(page_data)} titles")
 
             if not page_data:
                 consecutive_empty_pages += 1
-                print(f"⚠️ Empty page {page} (consecutive: {consecutive_empty_pages})")
+                logger.warning(f"⚠️ Empty page {page} (consecutive: {consecutive_empty_pages})")
                 if consecutive_empty_pages >= 3:
-                    print("🛑 3 consecutive empty pages, stopping scraping")
+                    logger.warning("🛑 3 consecutive empty pages, stopping scraping")
                     break
             else:
                 consecutive_empty_pages = 0
                 self.games_data.extend(page_data)
-                print(f"📊 Total titles so far: {len(self.games_data)}")
+                logger.debug("📊 Total titles so far: %d", len(self.games_data))
 
             # Sauvegarder tous les 5 pages
             if page % 5 == 0:
@@ -219,6 +576,7 @@ class PSVitaTitlesScraper:
             # Rate limiting
             time.sleep(random.uniform(1, 3))
 
+        progress.close()
         return self.games_data
 
     def save_progress(self, current_page):
@@ -227,39 +585,35 @@ class PSVitaTitlesScraper:
             'current_page': current_page,
             'total_games': len(self.games_data),
             'last_updated': time.strftime('%Y-%m-%d %H:%M:%S'),
-            'games_data': self.games_data
+            'games_data': [game.to_dict() for game in self.games_data]
         }
         
         with open('psvita_titles_progress.json', 'w', encoding='utf-8') as f:
             json.dump(progress_data, f, indent=2, ensure_ascii=False)
-        print(f"💾 Progress saved: {len(self.games_data)} titles")
+        logger.info(f"💾 Progress saved: {len(self.games_data)} titles")
 
     def save_to_csv(self, filename='psvita_titles.csv'):
         """Save games data to CSV file"""
         if not self.games_data:
-            print("❌ No data to save")
+            logger.error("❌ No data to save")
             return
 
         try:
             with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-                # Adapter les en-têtes pour Renascene
-                fieldnames = ['ID', 'Title', 'Region', 'Media_ID', 'Box_ID', 'Genre', 'Released']
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                
-                writer.writeheader()
-                for game in self.games_data:
-                    writer.writerow(game)
+                writer = csv.writer(csvfile)
+                writer.writerow(TITLE_CSV_FIELDS)
+                writer.writerows(game.to_row() for game in self.games_data)
             
-            print(f"✅ Saved {len(self.games_data)} PS Vita titles to {filename}")
+            logger.info(f"✅ Saved {len(self.games_data)} PS Vita titles to {filename}")
             
         except Exception as e:
-            print(f"❌ Error saving to CSV: {e}")
+            logger.error(f"❌ Error saving to CSV: {e}")
 
     def close_driver(self):
         """Fermer le driver"""
         if self.driver:
             self.driver.quit()
-            print("🔒 Driver closed")
+            logger.info("🔒 Driver closed")
 
 class PSVitaUpdateDownloader:
     """PS Vita update downloader inspired by PySN"""
@@ -272,6 +626,7 @@ class PSVitaUpdateDownloader:
             'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36'
         })
 
+    @profiled_stage('request_update')
     def request_update(self, title_id):
         """Request PS Vita update info from Sony servers with fallbacks"""
         try:
@@ -292,17 +647,17 @@ class PSVitaUpdateDownloader:
             
             # Essai avec plusieurs formats d'URL
             for idx, xml_url in enumerate(urls_to_try):
-                print(f"      🌐 Tentative URL #{idx+1}: {xml_url}")
+                logger.debug("      🌐 Tentative URL #%d: %s", idx + 1, xml_url)
                 try:
                     response = self.session.get(xml_url, stream=True, verify=False, timeout=30)
-                    print(f"      📡 Status: {response.status_code}, Length: {len(response.content)}")
+                    logger.debug("      📡 Status: %s, Length: %d", response.status_code, len(response.content))
                     
                     if response.status_code == 200 and response.content and len(response.content) > 10:
                         # Trouvé un XML valide
                         root = ET.fromstring(response.content)
                         return root, "Success"
                 except Exception as e:
-                    print(f"      ⚠️ Erreur URL #{idx+1}: {str(e)}")
+                    logger.debug("      ⚠️ Erreur URL #%d: %s", idx + 1, e)
                     continue
                 
             # Méthode de secours: recherche directe par motif de package
@@ -311,7 +666,7 @@ class PSVitaUpdateDownloader:
             return None, 'No update XML found'
         
         except Exception as e:
-            print(f"⚠️ Error processing {title_id}: {e}")
+            logger.warning(f"⚠️ Error processing {title_id}: {e}")
             return None, 'Error'
 
     def get_filename_from_url(self, url):
@@ -333,6 +688,68 @@ class PSVitaUpdateDownloader:
 
         return filename
 
+    def file_sha1(self, path):
+        """SHA1 of a local file (read in 1 MB chunks)"""
+        sha1 = hashlib.sha1()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                sha1.update(chunk)
+        return sha1.hexdigest().upper()
+
+    def is_downloaded(self, filename, size=0, sha1=None):
+        """True if the package is already on disk with the expected size/SHA1"""
+        path = self.download_path / filename
+        if not path.exists() or (size and path.stat().st_size != size):
+            return False
+        if not sha1 or sha1 == 'N/A':
+            return True
+
+        # Marqueur écrit après une vérification réussie, évite de re-hasher des centaines de MB
+        marker = path.with_name(path.name + '.sha1')
+        if marker.exists() and marker.read_text().strip().upper() == sha1.upper():
+            return True
+        if self.file_sha1(path) == sha1.upper():
+            marker.write_text(sha1.upper())
+            return True
+        return False
+
+    def download_package(self, url, filename, sha1=None, size=0):
+        """Download a .pkg to download_path, verifying its SHA1 when known"""
+        path = self.download_path / filename
+        part_path = path.with_name(path.name + '.part')
+        digest = hashlib.sha1()
+
+        try:
+            with self.session.get(url, stream=True, verify=False, timeout=30) as response:
+                if response.status_code != 200:
+                    logger.warning(f"⚠️ HTTP {response.status_code} for {url}")
+                    return 'error'
+                with open(part_path, 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=1024 * 1024):
+                        f.write(chunk)
+                        digest.update(chunk)
+
+            if size and part_path.stat().st_size != size:
+                logger.error(f"❌ Size mismatch for {filename}")
+                part_path.unlink()
+                return 'size_mismatch'
+            if sha1 and sha1 != 'N/A' and digest.hexdigest().upper() != sha1.upper():
+                logger.error(f"❌ SHA1 mismatch for {filename}")
+                part_path.unlink()
+                return 'sha1_mismatch'
+
+            os.replace(part_path, path)
+            if sha1 and sha1 != 'N/A':
+                path.with_name(path.name + '.sha1').write_text(sha1.upper())
+            logger.debug("      📥 Downloaded %s", filename)
+            return 'downloaded'
+
+        except Exception as e:
+            logger.error(f"❌ Error downloading {filename}: {e}")
+            if part_path.exists():
+                part_path.unlink()
+            return 'error'
+
     def discover_direct_packages(self, title_id):
         """Découvre les packages directs en utilisant les patterns observés"""
         title_id = title_id.strip().upper().replace('-', '')
@@ -343,7 +760,7 @@ class PSVitaUpdateDownloader:
         
         discovered_packages = []
         
-        print(f"      🔍 Recherche de packages directs pour {title_id}...")
+        logger.debug("      🔍 Recherche de packages directs pour %s...", title_id)
         
         for t_val in t_variants:
             folder_url = f"{base_url}{t_val}/"
@@ -353,7 +770,7 @@ class PSVitaUpdateDownloader:
                 response = self.session.head(folder_url, timeout=15, allow_redirects=True)
                 
                 if response.status_code == 200:
-                    print(f"      ✅ Dossier trouvé: {folder_url}")
+                    logger.debug("      ✅ Dossier trouvé: %s", folder_url)
                     
                     # Essayer de lister le contenu ou faire une requête GET pour voir la structure
                     try:
@@ -369,7 +786,7 @@ class PSVitaUpdateDownloader:
                             
                             for hash_val in hash_matches:
                                 hash_url = f"{folder_url}{hash_val}/"
-                                print(f"        📁 Hash trouvé: {hash_val}")
+                                logger.debug("        📁 Hash trouvé: %s", hash_val)
                                 
                                 # Essayer de lister le contenu du dossier hash
                                 hash_response = self.session.get(hash_url, timeout=15)
@@ -400,28 +817,27 @@ class PSVitaUpdateDownloader:
                                         except:
                                             pass
                                         
-                                        package_info = {
-                                            'version': version,
-                                            'url': pkg_url,
-                                            'sha1': 'N/A',
-                                            'size': size,
-                                            'filename': pkg_file,
-                                            'type': 'Direct Discovery',
-                                            'hash': hash_val,
-                                            't_variant': t_val
-                                        }
-                                        
-                                        discovered_packages.append(package_info)
-                                        print(f"        📦 Package trouvé: {pkg_file} ({size/1024/1024:.1f} MB)")
+                                        discovered_packages.append(UpdatePackage(
+                                            version=version,
+                                            url=pkg_url,
+                                            sha1='N/A',
+                                            size=size,
+                                            filename=pkg_file,
+                                            type=sys.intern('Direct Discovery'),
+                                            hash=hash_val,
+                                            t_variant=t_val
+                                        ))
+                                        logger.debug("        📦 Package trouvé: %s (%.1f MB)", pkg_file, size / 1024 / 1024)
                     
                     except Exception as e:
-                        print(f"        ⚠️ Erreur lors de l'exploration: {e}")
+                        logger.warning(f"        ⚠️ Erreur lors de l'exploration: {e}")
                         
             except Exception as e:
                 continue
         
         return discovered_packages
 
+    @profiled_stage('request_update_enhanced')
     def request_update_enhanced(self, title_id):
         """Version simplifiée qui extrait directement les liens du XML"""
         # Essayer la méthode XML standard
@@ -437,17 +853,17 @@ class PSVitaUpdateDownloader:
                 
                 if url and ver:
                     filename = self.get_filename_from_url(url)
-                    xml_updates.append({
-                        'version': ver,
-                        'url': url,  # Lien direct vers le .pkg
-                        'sha1': sha1 if sha1 else 'N/A',
-                        'size': int(size) if size else 0,
-                        'filename': filename,
-                        'type': 'XML Direct Link'
-                    })
+                    xml_updates.append(UpdatePackage(
+                        version=sys.intern(ver),
+                        url=url,  # Lien direct vers le .pkg
+                        sha1=sha1 if sha1 else 'N/A',
+                        size=int(size) if size else 0,
+                        filename=filename,
+                        type=sys.intern('XML Direct Link')
+                    ))
         
         if xml_updates:
-            print(f"      📦 Total trouvé: {len(xml_updates)} liens directs depuis XML")
+            logger.debug("      📦 Total trouvé: %d liens directs depuis XML", len(xml_updates))
         
         return xml_updates
 
@@ -456,72 +872,47 @@ class PSVitaUpdateDownloader:
         updates = self.request_update_enhanced(title_id)
         return updates if updates else None
 
-    def process_single_title(self, title_data):
-        """Process a single PS Vita title and return update links"""
-        media_id = title_data.get('Media_ID', '').strip().replace('-', '')
-        title_name = title_data.get('Title', 'Unknown')
-        region = title_data.get('Region', 'Unknown')
-        genre = title_data.get('Genre', 'Unknown')
+    def process_single_title(self, title):
+        """Process a single PS Vita title (TitleRecord) and return a TitleResult"""
+        result = TitleResult(
+            media_id=title.media_id.strip().replace('-', ''),
+            title_name=title.title,
+            region=title.region,
+            genre=title.genre,
+            has_updates=False,
+            status='no_updates'
+        )
         
         try:
-            print(f"🔍 Checking PS Vita {media_id} ({title_name})...")
-            updates = self.get_update_info(media_id)
+            logger.debug("🔍 Checking PS Vita %s (%s)...", result.media_id, result.title_name)
+            updates = self.get_update_info(result.media_id)
 
             if updates:
-                # Séparer par type pour les statistiques
-                xml_updates = [u for u in updates if u['type'] == 'XML Standard']
-                direct_updates = [u for u in updates if u['type'] == 'Direct Discovery']
-                
-                result = {
-                    'media_id': media_id,
-                    'title_name': title_name,
-                    'region': region,
-                    'genre': genre,
-                    'has_updates': True,
-                    'updates_count': len(updates),
-                    'xml_updates_count': len(xml_updates),
-                    'direct_updates_count': len(direct_updates),
-                    'total_size_bytes': sum(u['size'] for u in updates),
-                    'updates': updates,
-                    'status': 'success'
-                }
-                print(f"      ✅ {len(updates)} updates found ({len(xml_updates)} XML + {len(direct_updates)} direct)")
+                result.has_updates = True
+                result.status = 'success'
+                result.updates = updates
+                logger.debug("      ✅ %d updates found (%d XML + %d direct)",
+                             result.updates_count, result.xml_updates_count, result.direct_updates_count)
             else:
-                result = {
-                    'media_id': media_id,
-                    'title_name': title_name,
-                    'region': region,
-                    'genre': genre,
-                    'has_updates': False,
-                    'status': 'no_updates'
-                }
-                print(f"      ❌ No updates")
-
-            return result
+                logger.debug("      ❌ No updates")
 
         except Exception as e:
-            return {
-                'media_id': media_id,
-                'title_name': title_name,
-                'region': region,
-                'genre': genre,
-                'has_updates': False,
-                'status': 'error',
-                'error': str(e)
-            }
+            result.status = 'error'
+            result.error = str(e)
+
+        return result
 
-    def batch_get_update_links(self, csv_file='psvita_titles.csv', max_titles=None, max_workers=6):
+    def batch_get_update_links(self, csv_file='psvita_titles.csv', max_titles=None, max_workers=6, probe_headers=False):
         """Process multiple PS Vita titles to get update links"""
         try:
             # Charger les données du CSV
-            df = pd.read_csv(csv_file)
-            titles_list = df.to_dict('records')
+            titles_list = load_titles_csv(csv_file)
             
             if max_titles:
                 titles_list = titles_list[:max_titles]
             
             total_titles = len(titles_list)
-            print(f"🚀 Processing {total_titles} PS Vita titles with {max_workers} workers...")
+            logger.info(f"🚀 Processing {total_titles} PS Vita titles with {max_workers} workers...")
             
             results = []
             successful_updates = 0
@@ -529,106 +920,820 @@ class PSVitaUpdateDownloader:
             no_updates = 0
             
             start_time = time.time()
+            progress = ProgressLine(total_titles, 'Titles')
             
             # Traitement séquentiel pour éviter de surcharger les serveurs Sony
             for idx, title_data in enumerate(titles_list, 1):
-                progress = (idx / total_titles) * 100
-                elapsed = time.time() - start_time
-                estimated_total = elapsed / idx * total_titles if idx > 0 else 0
-                remaining = estimated_total - elapsed if idx > 0 else 0
-                
-                print(f"\n📄 [{idx}/{total_titles}] ({progress:.1f}%) - ETA: {remaining/60:.1f} min")
-                
                 result = self.process_single_title(title_data)
                 results.append(result)
                 
                 # Statistiques
-                if result['status'] == 'success' and result['has_updates']:
+                if result.status == 'success' and result.has_updates:
                     successful_updates += 1
-                elif result['status'] == 'no_updates':
+                elif result.status == 'no_updates':
                     no_updates += 1
                 else:
                     errors += 1
+
+                progress.update(idx, f"- ✅ {successful_updates} ❌ {no_updates} ⚠️ {errors}")
                 
                 # Sauvegarder le progrès tous les 50 titres
                 if idx % 50 == 0:
                     self.save_batch_results(results, f'psvita_updates_progress_{idx}.json')
-                    print(f"💾 Progress saved: {idx} titles processed")
+                    logger.info(f"💾 Progress saved: {idx} titles processed")
                 
                 # Rate limiting pour éviter de surcharger les serveurs
                 time.sleep(random.uniform(0.5, 1.5))
+
+            progress.close()
             
+            # Lire les en-têtes PKG (Range requests) avant la sauvegarde finale
+            if probe_headers:
+                PSVitaPkgProbe(max_workers=max_workers).enrich_results(results)
+
             # Sauvegarder les résultats finaux
             self.save_batch_results(results, 'psvita_updates_final.json')
             self.save_results_to_csv(results, 'psvita_updates_results.csv')
             
             # Statistiques finales
             total_time = time.time() - start_time
-            print(f"\n" + "="*60)
-            print(f"📊 FINAL STATISTICS:")
-            print(f"   Total processed: {total_titles}")
-            print(f"   ✅ With updates: {successful_updates}")
-            print(f"   ❌ No updates: {no_updates}")
-            print(f"   ⚠️ Errors: {errors}")
-            print(f"   ⏱️ Total time: {total_time/60:.1f} minutes")
-            print(f"   📈 Success rate: {(successful_updates/total_titles)*100:.1f}%")
-            print(f"="*60)
+            logger.info("=" * 60)
+            logger.info(f"📊 FINAL STATISTICS:")
+            logger.info(f"   Total processed: {total_titles}")
+            logger.info(f"   ✅ With updates: {successful_updates}")
+            logger.info(f"   ❌ No updates: {no_updates}")
+            logger.info(f"   ⚠️ Errors: {errors}")
+            logger.info(f"   ⏱️ Total time: {total_time/60:.1f} minutes")
+            logger.info(f"   📈 Success rate: {(successful_updates/total_titles)*100:.1f}%")
+            logger.info("=" * 60)
             
             return results
             
         except Exception as e:
-            print(f"❌ Error in batch processing: {e}")
+            if ProgressLine.current:
+                ProgressLine.current.close()
+            logger.error(f"❌ Error in batch processing: {e}")
             return []
 
     def save_batch_results(self, results, filename):
         """Save batch results to JSON file"""
         try:
             with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(results, f, indent=2, ensure_ascii=False)
+                json.dump([result.to_dict() for result in results], f, indent=2, ensure_ascii=False)
         except Exception as e:
-            print(f"⚠️ Error saving to {filename}: {e}")
+            logger.warning(f"⚠️ Error saving to {filename}: {e}")
 
+    @profiled_stage('save_results_to_csv')
     def save_results_to_csv(self, results, filename):
-        """Save results to CSV file"""
+        """Save results to CSV file (one row per update)"""
         try:
-            csv_data = []
-            for result in results:
-                base_row = {
-                    'Media_ID': result['media_id'],
-                    'Title': result['title_name'],
-                    'Region': result['region'],
-                    'Genre': result['genre'],
-                    'Has_Updates': result['has_updates'],
-                    'Status': result['status'],
-                    'Updates_Count': result.get('updates_count', 0),
-                    'XML_Updates': result.get('xml_updates_count', 0),
-                    'Direct_Updates': result.get('direct_updates_count', 0),
-                    'Total_Size_MB': result.get('total_size_bytes', 0) / 1024 / 1024 if result.get('total_size_bytes') else 0
-                }
-                
-                if result['has_updates'] and 'updates' in result:
+            with_headers = any(u.pkg_header is not None for r in results for u in r.updates)
+            header = RESULT_CSV_FIELDS + UPDATE_CSV_FIELDS
+            if with_headers:
+                header += [column for column, _ in PKG_HEADER_COLUMNS]
+
+            empty_update = ('',) * (len(header) - len(RESULT_CSV_FIELDS))
+
+            with open(filename, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f, lineterminator='\n')
+                writer.writerow(header)
+                for result in results:
+                    total_size = result.total_size_bytes
+                    base_row = (
+                        result.media_id, result.title_name, result.region, result.genre,
+                        result.has_updates, result.status, result.updates_count,
+                        result.xml_updates_count, result.direct_updates_count,
+                        total_size / 1024 / 1024 if total_size else 0.0
+                    )
+
+                    if not result.has_updates or not result.updates:
+                        # Pas d'updates, une seule ligne
+                        writer.writerow(base_row + empty_update)
+                        continue
+
                     # Une ligne par update
-                    for update in result['updates']:
-                        row = base_row.copy()
-                        row.update({
-                            'Update_Version': update['version'],
-                            'Update_URL': update['url'],
-                            'Update_SHA1': update['sha1'],
-                            'Update_Size_MB': update['size'] / 1024 / 1024 if update['size'] else 0,
-                            'Update_Filename': update['filename'],
-                            'Update_Type': update['type']
-                        })
-                        csv_data.append(row)
-                else:
-                    # Pas d'updates, une seule ligne
-                    csv_data.append(base_row)
-            
-            df = pd.DataFrame(csv_data)
-            df.to_csv(filename, index=False, encoding='utf-8')
-            print(f"✅ Results saved to {filename}")
+                    for update in result.updates:
+                        row = base_row + (
+                            update.version, update.url, update.sha1,
+                            update.size / 1024 / 1024 if update.size else 0.0,
+                            update.filename, update.type
+                        )
+                        if with_headers:
+                            pkg_header = update.pkg_header or {}
+                            row += tuple(pkg_header.get(key) for _, key in PKG_HEADER_COLUMNS)
+                        writer.writerow(row)
+
+            logger.info(f"✅ Results saved to {filename}")
             
         except Exception as e:
-            print(f"❌ Error saving CSV: {e}")
+            logger.error(f"❌ Error saving CSV: {e}")
+
+# Colonnes ajoutées au CSV de résultats -> clé dans le dict renvoyé par PSVitaPkgProbe
+PKG_HEADER_COLUMNS = [
+    ('PKG_Content_ID', 'content_id'),
+    ('PKG_Revision', 'revision'),
+    ('PKG_Platform', 'platform'),
+    ('PKG_Content_Type', 'content_type'),
+    ('PKG_Declared_Size_MB', 'declared_size_mb'),
+    ('PKG_App_Version', 'app_version'),
+    ('PKG_Category', 'category'),
+    ('PKG_Required_FW', 'required_fw'),
+]
+
+PKG_CONTENT_TYPES = {
+    0x06: 'PSX',
+    0x07: 'PSP',
+    0x0E: 'PSP Minis',
+    0x0F: 'PSP NeoGeo',
+    0x15: 'PSV Application',
+    0x16: 'PSV DLC',
+    0x18: 'PSM',
+    0x1D: 'PSM',
+    0x1F: 'PSV Theme',
+}
+
+class PSVitaPkgProbe:
+    """Read PKG header metadata with HTTP Range requests (no full download)"""
+
+    def __init__(self, cache_file='psvita_pkg_headers_cache.json', max_workers=8,
+                 initial_bytes=8192, timeout=20, max_header_bytes=256 * 1024):
+        self.cache_file = cache_file
+        self.max_workers = max_workers
+        self.initial_bytes = initial_bytes
+        # Plafond des lectures suivantes: au-delà, ce n'est plus "quelques KB"
+        self.max_header_bytes = max_header_bytes
+        self.timeout = timeout
+        self.cache = {}
+        self.cache_lock = threading.Lock()
+
+        # Une seule session partagée par les workers, avec un pool à la bonne taille
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({
+            'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36'
+        })
+
+        self.load_cache()
+
+    def load_cache(self):
+        """Load cached PKG headers (keyed by SHA1)"""
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                self.cache = json.load(f)
+            logger.info(f"📂 Loaded {len(self.cache)} cached PKG headers")
+        except Exception as e:
+            logger.warning(f"⚠️ Error loading {self.cache_file}: {e}")
+            self.cache = {}
+
+    def save_cache(self):
+        """Save cached PKG headers"""
+        if not self.cache_file:
+            return
+        try:
+            with self.cache_lock:
+                with open(self.cache_file, 'w', encoding='utf-8') as f:
+                    json.dump(self.cache, f, indent=2, ensure_ascii=False)
+        except Exception as e:
+            logger.warning(f"⚠️ Error saving {self.cache_file}: {e}")
+
+    def cache_key(self, url, sha1):
+        """SHA1 du XML si disponible, sinon l'URL"""
+        if sha1 and isinstance(sha1, str) and sha1 != 'N/A':
+            return sha1.strip().upper()
+        return url
+
+    def fetch_range(self, url, start, end):
+        """Fetch bytes [start, end] of a remote file"""
+        headers = {'Range': f'bytes={start}-{end}'}
+        response = self.session.get(url, headers=headers, stream=True, verify=False, timeout=self.timeout)
+        try:
+            if response.status_code not in (200, 206):
+                raise ValueError(f"HTTP {response.status_code}")
+
+            # 200 = le serveur ignore le Range: on lit seulement le début puis on coupe la connexion
+            skip = start if response.status_code == 200 else 0
+            wanted = skip + end - start + 1
+            data = bytearray()
+            for chunk in response.iter_content(chunk_size=8192):
+                data += chunk
+                if len(data) >= wanted:
+                    break
+            return bytes(data[skip:wanted])
+        finally:
+            response.close()
+
+    def parse_header(self, data):
+        """Parse the fixed PKG header (big-endian)"""
+        if len(data) < 0x54 or data[:4] != b'\x7fPKG':
+            raise ValueError("Not a PKG file (bad magic)")
+
+        (_, revision, pkg_type, meta_offset, meta_count, meta_size, item_count,
+         total_size, data_offset, data_size, content_id) = struct.unpack('>4sHHIIIIQQQ36s', data[:0x54])
+
+        return {
+            'revision': 'Retail' if revision & 0x8000 else 'Debug',
+            'platform': {1: 'PS3', 2: 'PSP/PS Vita'}.get(pkg_type, f'0x{pkg_type:X}'),
+            'meta_offset': meta_offset,
+            'meta_count': meta_count,
+            'meta_size': meta_size,
+            'item_count': item_count,
+            'total_size': total_size,
+            'data_offset': data_offset,
+            'data_size': data_size,
+            'content_id': content_id.split(b'\x00')[0].decode('ascii', 'replace'),
+        }
+
+    def parse_metadata(self, data, header):
+        """Parse the metadata block (id, size, value) entries"""
+        meta = {}
+        offset = header['meta_offset']
+        for _ in range(header['meta_count']):
+            if offset + 8 > len(data):
+                break
+            entry_id, entry_size = struct.unpack('>II', data[offset:offset + 8])
+            value = data[offset + 8:offset + 8 + entry_size]
+            offset += 8 + entry_size
+
+            if entry_id == 0x2 and len(value) >= 4:
+                content_type = struct.unpack('>I', value[:4])[0]
+                meta['content_type'] = PKG_CONTENT_TYPES.get(content_type, f'0x{content_type:X}')
+            elif entry_id == 0x4 and len(value) >= 8:
+                meta['package_size'] = struct.unpack('>Q', value[:8])[0]
+            elif entry_id == 0xE and len(value) >= 8:
+                # Copie non chiffrée du param.sfo
+                meta['sfo_offset'], meta['sfo_size'] = struct.unpack('>II', value[:8])
+        return meta
+
+    def parse_sfo(self, data):
+        """Parse a PARAM.SFO blob (little-endian) into a dict"""
+        if len(data) < 20 or data[:4] != b'\x00PSF':
+            return {}
+
+        _, key_table, data_table, entries = struct.unpack('<IIII', data[4:20])
+        params = {}
+        for i in range(entries):
+            entry = data[20 + i * 16:36 + i * 16]
+            if len(entry) < 16:
+                break
+            key_offset, fmt, length, _, data_offset = struct.unpack('<HHIII', entry)
+            key_start = key_table + key_offset
+            key = data[key_start:data.index(b'\x00', key_start)].decode('ascii', 'replace')
+            raw = data[data_table + data_offset:data_table + data_offset + length]
+            if fmt == 0x0404 and len(raw) >= 4:
+                params[key] = struct.unpack('<I', raw[:4])[0]
+            else:
+                params[key] = raw.split(b'\x00')[0].decode('utf-8', 'replace')
+        return params
+
+    def format_firmware(self, system_ver):
+        """0x03600000 -> '3.60'"""
+        if not system_ver:
+            return 'N/A'
+        return f"{(system_ver >> 24) & 0xFF:X}.{(system_ver >> 16) & 0xFF:02X}"
+
+    def check_header_end(self, end, header, label):
+        """Refuse reads past the header area (offsets come from remote bytes)"""
+        limit = self.max_header_bytes
+        if header['data_offset']:
+            limit = min(limit, header['data_offset'])
+        if end > limit:
+            raise ValueError(f"{label} ends at 0x{end:X}, past the header limit 0x{limit:X}")
+
+    @profiled_stage('probe_pkg_header')
+    def probe(self, url, sha1=None):
+        """Probe a single PKG and return its header info"""
+        key = self.cache_key(url, sha1)
+        with self.cache_lock:
+            if key in self.cache:
+                return self.cache[key]
+
+        try:
+            data = self.fetch_range(url, 0, self.initial_bytes - 1)
+            header = self.parse_header(data)
+
+            # Récupérer la suite seulement si le bloc metadata dépasse la première lecture
+            meta_end = header['meta_offset'] + header['meta_size']
+            self.check_header_end(meta_end, header, 'metadata')
+            if meta_end > len(data):
+                data += self.fetch_range(url, len(data), meta_end - 1)
+            meta = self.parse_metadata(data, header)
+
+            sfo = {}
+            if meta.get('sfo_size'):
+                sfo_end = meta['sfo_offset'] + meta['sfo_size']
+                self.check_header_end(sfo_end, header, 'param.sfo')
+                if sfo_end > len(data):
+                    data += self.fetch_range(url, len(data), sfo_end - 1)
+                sfo = self.parse_sfo(data[meta['sfo_offset']:sfo_end])
+
+            declared_size = meta.get('package_size') or header['total_size']
+            info = {
+                'content_id': header['content_id'],
+                'revision': header['revision'],
+                'platform': header['platform'],
+                'content_type': meta.get('content_type', 'Unknown'),
+                'declared_size': declared_size,
+                'declared_size_mb': declared_size / 1024 / 1024,
+                'app_version': sfo.get('APP_VER', 'N/A'),
+                'category': sfo.get('CATEGORY', 'N/A'),
+                'required_fw': self.format_firmware(sfo.get('PSP2_SYSTEM_VER')),
+                'status': 'ok'
+            }
+        except Exception as e:
+            # Pas de cache pour les erreurs, on retentera au prochain passage
+            return {'status': f'error: {e}'}
+
+        with self.cache_lock:
+            self.cache[key] = info
+        return info
+
+    def probe_many(self, packages):
+        """Probe (url, sha1) pairs concurrently, returns {cache_key: info}"""
+        unique = {}
+        for url, sha1 in packages:
+            if url:
+                unique.setdefault(self.cache_key(url, sha1), (url, sha1))
+
+        results = {}
+        if not unique:
+            return results
+
+        logger.info(f"🔬 Probing {len(unique)} PKG headers with {self.max_workers} workers...")
+        errors = 0
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(self.probe, url, sha1): key for key, (url, sha1) in unique.items()}
+            for future in as_completed(futures):
+                info = future.result()
+                results[futures[future]] = info
+                if info.get('status') != 'ok':
+                    errors += 1
+
+        self.save_cache()
+        logger.info(f"✅ PKG headers probed: {len(results) - errors} ok, {errors} errors")
+        return results
+
+    def enrich_results(self, results):
+        """Attach pkg_header to every update of batch results"""
+        packages = [(u.url, u.sha1) for r in results for u in r.updates]
+        probed = self.probe_many(packages)
+        for result in results:
+            for update in result.updates:
+                update.pkg_header = probed.get(self.cache_key(update.url, update.sha1), {})
+        return results
+
+    def enrich_results_csv(self, csv_file='psvita_updates_results.csv', output_file=None, overwrite=False):
+        """Add PKG header columns to a results CSV (streamed, other columns copied verbatim)"""
+        if overwrite:
+            output_file = csv_file
+        elif not output_file:
+            path = Path(csv_file)
+            output_file = str(path.with_name(f"{path.stem}_pkg{path.suffix}"))
+
+        try:
+            # Première passe: seulement les (url, sha1) à sonder
+            with open(csv_file, 'r', newline='', encoding='utf-8') as f:
+                reader = csv.reader(f)
+                header = next(reader, [])
+                url_idx = header.index('Update_URL')
+                sha1_idx = header.index('Update_SHA1')
+                packages = [(row[url_idx], row[sha1_idx]) for row in reader if row[url_idx]]
+        except FileNotFoundError:
+            logger.error(f"❌ {csv_file} not found")
+            return None
+        except ValueError as e:
+            logger.error(f"❌ {csv_file}: {e}")
+            return None
+
+        probed = self.probe_many(packages)
+
+        # Remplacer les colonnes PKG_* d'un passage précédent au lieu de les dupliquer
+        pkg_columns = [column for column, _ in PKG_HEADER_COLUMNS]
+        kept = [idx for idx, name in enumerate(header) if name not in pkg_columns]
+
+        tmp_file = output_file + '.tmp'
+        with open(csv_file, 'r', newline='', encoding='utf-8') as src, \
+             open(tmp_file, 'w', newline='', encoding='utf-8') as dst:
+            reader = csv.reader(src)
+            writer = csv.writer(dst, lineterminator='\n')
+            next(reader, None)
+            writer.writerow([header[idx] for idx in kept] + pkg_columns)
+            for row in reader:
+                info = probed.get(self.cache_key(row[url_idx], row[sha1_idx]), {}) if row[url_idx] else {}
+                writer.writerow([row[idx] for idx in kept] + [info.get(key, '') for _, key in PKG_HEADER_COLUMNS])
+        os.replace(tmp_file, output_file)
+
+        logger.info(f"✅ PKG header columns saved to {output_file}")
+        return output_file
+
+DIFF_CSV_COLUMNS = ['Change', 'Media_ID', 'Update_Version', 'Title', 'Changed_Fields',
+                    'Old_SHA1', 'New_SHA1', 'Old_Size_MB', 'New_Size_MB', 'Update_URL']
+
+class PSVitaScanDiff:
+    """Streaming diff between two psvita_updates_results.csv scans"""
+
+    def __init__(self, old_file, new_file, dedupe_unmatched=False):
+        self.old_file = old_file
+        self.new_file = new_file
+        # Détecter aussi les doublons parmi les clés absentes de l'index (mémoire ~ taille du diff)
+        self.dedupe_unmatched = dedupe_unmatched
+        self.summary = {'added': 0, 'removed': 0, 'changed': 0, 'unchanged': 0, 'duplicates': 0}
+
+    def iter_packages(self, filename):
+        """Stream (media_id, version, title, sha1, size_bytes, url) rows with an update"""
+        with open(filename, 'r', newline='', encoding='utf-8') as f:
+            reader = csv.reader(f)
+            header = next(reader, [])
+            col = {name: idx for idx, name in enumerate(header)}
+            needed = ['Media_ID', 'Title', 'Update_Version', 'Update_SHA1', 'Update_Size_MB', 'Update_URL']
+            missing = [name for name in needed if name not in col]
+            if missing:
+                raise ValueError(f"{filename}: missing columns {', '.join(missing)}")
+
+            for row in reader:
+                version = row[col['Update_Version']]
+                if not version:
+                    # Titre sans update, pas de package à comparer
+                    continue
+                size_mb = row[col['Update_Size_MB']]
+                # Comparer les tailles en octets pour ignorer le formatage des floats
+                size = round(float(size_mb) * 1024 * 1024) if size_mb else 0
+                yield (row[col['Media_ID']], version, row[col['Title']],
+                       row[col['Update_SHA1']].upper(), size, row[col['Update_URL']])
+
+    def make_change(self, change, old, new, changed_fields=''):
+        """Build one change record from old/new package tuples"""
+        ref = new or old
+        return {
+            'Change': change,
+            'Media_ID': ref[0],
+            'Update_Version': ref[1],
+            'Title': ref[2],
+            'Changed_Fields': changed_fields,
+            'Old_SHA1': old[3] if old else '',
+            'New_SHA1': new[3] if new else '',
+            'Old_Size_MB': old[4] / 1024 / 1024 if old else '',
+            'New_Size_MB': new[4] / 1024 / 1024 if new else '',
+            'Update_URL': ref[5],
+        }
+
+    def iter_changes(self):
+        """Yield change records in a single pass over each file"""
+        # Indexer le plus petit fichier, streamer le plus grand
+        index_old = os.path.getsize(self.old_file) <= os.path.getsize(self.new_file)
+        indexed_file, streamed_file = (self.old_file, self.new_file) if index_old else (self.new_file, self.old_file)
+
+        # Clé (Media_ID, Update_Version): les chaînes sont déjà dans la valeur, pas de collision possible
+        index = {}
+        for package in self.iter_packages(indexed_file):
+            key = package[:2]
+            if key in index:
+                self.summary['duplicates'] += 1
+                continue
+            index[key] = package
+
+        unmatched_seen = set()
+        for package in self.iter_packages(streamed_file):
+            key = package[:2]
+
+            if key not in index:
+                # Absent du fichier indexé: on ne l'ajoute pas à l'index (mémoire bornée par le petit côté)
+                if self.dedupe_unmatched:
+                    if key in unmatched_seen:
+                        self.summary['duplicates'] += 1
+                        continue
+                    unmatched_seen.add(key)
+                change = 'added' if index_old else 'removed'
+                self.summary[change] += 1
+                yield self.make_change(change, None, package) if index_old else self.make_change(change, package, None)
+                continue
+
+            other = index[key]
+            if other is None:
+                # Clé déjà appariée: doublon dans le fichier streamé
+                self.summary['duplicates'] += 1
+                continue
+
+            # Marquer la clé comme appariée, sans créer de nouvelle entrée
+            index[key] = None
+            old, new = (other, package) if index_old else (package, other)
+
+            changed_fields = []
+            if old[3] != new[3]:
+                changed_fields.append('sha1')
+            if old[4] != new[4]:
+                changed_fields.append('size')
+
+            if changed_fields:
+                self.summary['changed'] += 1
+                yield self.make_change('changed', old, new, ';'.join(changed_fields))
+            else:
+                self.summary['unchanged'] += 1
+
+        # Ce qui reste dans l'index n'existe que dans le fichier indexé
+        change = 'removed' if index_old else 'added'
+        for package in index.values():
+            if package is None:
+                continue
+            self.summary[change] += 1
+            if index_old:
+                yield self.make_change(change, package, None)
+            else:
+                yield self.make_change(change, None, package)
+
+    def write_report(self, json_file='psvita_updates_diff.json', csv_file='psvita_updates_diff.csv'):
+        """Stream the change report to JSON and CSV, return the summary"""
+        try:
+            with open(json_file, 'w', encoding='utf-8') as jf, \
+                 open(csv_file, 'w', newline='', encoding='utf-8') as cf:
+                writer = csv.DictWriter(cf, fieldnames=DIFF_CSV_COLUMNS)
+                writer.writeheader()
+
+                jf.write('{\n')
+                jf.write(f'  "old_file": {json.dumps(self.old_file)},\n')
+                jf.write(f'  "new_file": {json.dumps(self.new_file)},\n')
+                jf.write('  "changes": [')
+
+                first = True
+                for change in self.iter_changes():
+                    writer.writerow(change)
+                    jf.write('\n    ' if first else ',\n    ')
+                    jf.write(json.dumps(change, ensure_ascii=False))
+                    first = False
+
+                jf.write('\n  ],\n')
+                jf.write(f'  "summary": {json.dumps(self.summary)}\n')
+                jf.write('}\n')
+
+            logger.info(f"✅ Diff saved to {json_file} and {csv_file}")
+            logger.info(f"   ➕ Added: {self.summary['added']}")
+            logger.info(f"   ➖ Removed: {self.summary['removed']}")
+            logger.info(f"   🔄 Changed: {self.summary['changed']}")
+            logger.info(f"   ✔️ Unchanged: {self.summary['unchanged']}")
+            return self.summary
+
+        except Exception as e:
+            logger.error(f"❌ Error computing diff: {e}")
+            return None
+
+DOWNLOAD_ORDERS = ('smallest', 'largest', 'scan')
+
+@dataclass(slots=True)
+class DownloadJob:
+    """One unique package to fetch, possibly shared by several titles"""
+    url: str
+    sha1: str
+    size: int
+    filename: str
+    version: str
+    region: str
+    media_ids: list = field(default_factory=list)
+
+def version_key(version):
+    """'01.04' -> (1, 4) pour comparer les versions"""
+    try:
+        return tuple(int(part) for part in version.split('.'))
+    except ValueError:
+        return (-1,)
+
+class PSVitaDownloadScheduler:
+    """Dedupe, filter and order packages from a results CSV before downloading"""
+
+    def __init__(self, downloader, order='smallest', latest_only=False, regions=None, bandwidth_mb=10.0):
+        if order not in DOWNLOAD_ORDERS:
+            raise ValueError(f"Unknown order '{order}' (expected one of {', '.join(DOWNLOAD_ORDERS)})")
+        self.downloader = downloader
+        self.order = order
+        self.latest_only = latest_only
+        self.regions = {region.upper() for region in regions} if regions else None
+        self.bandwidth_mb = bandwidth_mb
+        self.jobs = []
+        self.skipped = []
+        self.duplicates = 0
+
+    def load_jobs(self, csv_file='psvita_updates_results.csv'):
+        """Read update rows, apply the filters and dedupe by SHA1/URL"""
+        rows = []
+        with open(csv_file, 'r', newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                if not row.get('Update_URL'):
+                    continue
+                if self.regions and row['Region'].upper() not in self.regions:
+                    continue
+                rows.append(row)
+
+        if self.latest_only:
+            latest = {}
+            for row in rows:
+                best = latest.get(row['Media_ID'])
+                if best is None or version_key(row['Update_Version']) > version_key(best['Update_Version']):
+                    latest[row['Media_ID']] = row
+            rows = list(latest.values())
+
+        jobs = {}
+        by_url = {}
+        for row in rows:
+            sha1 = row['Update_SHA1'].upper() if row['Update_SHA1'] and row['Update_SHA1'] != 'N/A' else ''
+            key = sha1 or row['Update_URL']
+            job = jobs.get(key) or by_url.get(row['Update_URL'])
+            if job is not None:
+                # Même package référencé par plusieurs lignes de titres
+                self.duplicates += 1
+                if row['Media_ID'] not in job.media_ids:
+                    job.media_ids.append(row['Media_ID'])
+                continue
+
+            size_mb = row['Update_Size_MB']
+            job = DownloadJob(
+                url=row['Update_URL'],
+                sha1=sha1,
+                size=round(float(size_mb) * 1024 * 1024) if size_mb else 0,
+                filename=row['Update_Filename'] or self.downloader.get_filename_from_url(row['Update_URL']),
+                version=row['Update_Version'],
+                region=sys.intern(row['Region']),
+                media_ids=[row['Media_ID']]
+            )
+            jobs[key] = job
+            by_url[job.url] = job
+
+        self.jobs = list(jobs.values())
+        if self.order == 'smallest':
+            self.jobs.sort(key=lambda job: job.size)
+        elif self.order == 'largest':
+            self.jobs.sort(key=lambda job: job.size, reverse=True)
+        return self.jobs
+
+    def plan(self):
+        """Drop packages already on disk and verified, log projected bytes/ETA"""
+        pending = []
+        self.skipped = []
+        for job in self.jobs:
+            if self.downloader.is_downloaded(job.filename, job.size, job.sha1):
+                self.skipped.append(job)
+            else:
+                pending.append(job)
+        self.jobs = pending
+
+        total_bytes = sum(job.size for job in self.jobs)
+        eta = total_bytes / (self.bandwidth_mb * 1024 * 1024) if self.bandwidth_mb else 0
+        summary = {
+            'packages': len(self.jobs),
+            'already_downloaded': len(self.skipped),
+            'duplicates_merged': self.duplicates,
+            'total_bytes': total_bytes,
+            'eta_seconds': eta
+        }
+
+        logger.info("=" * 60)
+        logger.info(f"📋 DOWNLOAD PLAN ({self.order} first{', latest only' if self.latest_only else ''}"
+                    f"{', regions ' + '/'.join(sorted(self.regions)) if self.regions else ''}):")
+        logger.info(f"   📦 To download: {len(self.jobs)} packages")
+        logger.info(f"   ✅ Already downloaded: {len(self.skipped)}")
+        logger.info(f"   🔗 Duplicate rows merged: {self.duplicates}")
+        logger.info(f"   💾 Total: {total_bytes / 1024 / 1024:.1f} MB")
+        logger.info(f"   ⏱️ ETA: {eta / 60:.1f} min at {self.bandwidth_mb:.1f} MB/s")
+        logger.info("=" * 60)
+        return summary
+
+    def run(self):
+        """Download pending jobs in scheduled order"""
+        stats = {'downloaded': 0, 'failed': 0, 'bytes': 0}
+        start_time = time.time()
+        progress = ProgressLine(len(self.jobs), 'Packages')
+
+        for idx, job in enumerate(self.jobs, 1):
+            status = self.downloader.download_package(job.url, job.filename, job.sha1, job.size)
+            if status == 'downloaded':
+                stats['downloaded'] += 1
+                stats['bytes'] += job.size
+            else:
+                stats['failed'] += 1
+
+            elapsed = time.time() - start_time
+            rate = stats['bytes'] / elapsed / 1024 / 1024 if elapsed else 0
+            progress.update(idx, f"- {stats['bytes'] / 1024 / 1024:.0f} MB @ {rate:.1f} MB/s")
+
+        progress.close()
+        logger.info(f"✅ Downloads finished: {stats['downloaded']} ok, {stats['failed']} failed, "
+                    f"{stats['bytes'] / 1024 / 1024:.1f} MB in {(time.time() - start_time) / 60:.1f} min")
+        return stats
+
+def counts_dict(series):
+    """pandas Series -> {str: int} JSON-friendly"""
+    return {str(key): int(value) for key, value in series.items()}
+
+class PSVitaStatistics:
+    """Vectorized statistics over the titles and update results CSVs"""
+
+    def __init__(self, titles_csv='psvita_titles.csv', updates_csv='psvita_updates_results.csv', top_n=10):
+        self.titles_csv = titles_csv
+        self.updates_csv = updates_csv
+        self.top_n = top_n
+
+    def title_stats(self):
+        df = pd.read_csv(self.titles_csv, usecols=['Region', 'Media_ID', 'Genre'],
+                         dtype={'Region': 'category', 'Media_ID': str, 'Genre': str})
+        genre = df['Genre'].fillna('Unknown')
+        return {
+            'total': len(df),
+            'by_region': counts_dict(df['Region'].value_counts()),
+            'by_prefix': counts_dict(df['Media_ID'].str[:4].value_counts()),
+            # "Action » Platformer » 3D" -> "Action"
+            'by_genre': counts_dict(genre.str.split(' » ', n=1).str[0].value_counts()),
+            'by_genre_detail': counts_dict(genre.value_counts().head(self.top_n))
+        }
+
+    def group_sizes(self, packages, key):
+        grouped = packages.groupby(key, observed=True)['Update_Size_MB'].agg(['count', 'sum'])
+        return {
+            str(name): {'packages': int(row['count']), 'total_mb': round(float(row['sum']), 2)}
+            for name, row in grouped.sort_values('sum', ascending=False).iterrows()
+        }
+
+    def update_stats(self):
+        df = pd.read_csv(self.updates_csv, usecols=['Media_ID', 'Title', 'Region', 'Status', 'Updates_Count',
+                                                    'Update_Version', 'Update_URL', 'Update_Size_MB'],
+                         dtype={'Region': 'category', 'Status': 'category', 'Update_Version': str,
+                                'Update_Size_MB': float})
+        titles = df.drop_duplicates(['Media_ID', 'Title'])
+        packages = df[df['Update_URL'].notna()].assign(Prefix=lambda d: d['Media_ID'].str[:4])
+        sizes = packages['Update_Size_MB']
+        largest = packages.nlargest(self.top_n, 'Update_Size_MB') if len(packages) else packages
+
+        # Pas de package: percentiles à 0 plutôt que NaN (JSON invalide)
+        percentiles = {'p50': 0.0, 'p75': 0.0, 'p90': 0.0, 'p95': 0.0, 'p99': 0.0, 'max': 0.0}
+        if len(sizes):
+            percentiles = {
+                f"p{int(q * 100)}": round(float(value), 2)
+                for q, value in sizes.quantile([0.5, 0.75, 0.9, 0.95, 0.99]).items()
+            } | {'max': round(float(sizes.max()), 2)}
+
+        return {
+            'titles_checked': len(titles),
+            'by_status': counts_dict(titles['Status'].value_counts()),
+            'updates_per_title': counts_dict(titles['Updates_Count'].value_counts().sort_index()),
+            'packages': len(packages),
+            'unique_packages': int(packages['Update_URL'].nunique()),
+            'total_mb': round(float(sizes.sum()), 2),
+            'size_percentiles_mb': percentiles,
+            'by_region': self.group_sizes(packages, 'Region'),
+            'by_prefix': self.group_sizes(packages, 'Prefix'),
+            'largest_packages': [
+                {'media_id': row.Media_ID, 'title': row.Title, 'version': row.Update_Version,
+                 'size_mb': round(float(row.Update_Size_MB), 2), 'url': row.Update_URL}
+                for row in largest.itertuples(index=False)
+            ]
+        }
+
+    def compute(self):
+        """Return all statistics as a JSON-serializable dict"""
+        start = time.perf_counter()
+        stats = {}
+        if os.path.exists(self.titles_csv):
+            stats['titles'] = self.title_stats()
+        if os.path.exists(self.updates_csv):
+            stats['updates'] = self.update_stats()
+        stats['elapsed_ms'] = round((time.perf_counter() - start) * 1000, 1)
+        return stats
+
+    def print_report(self, stats):
+        """Human readable version of compute()"""
+        if 'titles' in stats:
+            titles = stats['titles']
+            print(f"\n📊 PS Vita Titles Statistics:")
+            print(f"   Total titles: {titles['total']}")
+            print(f"   Regions distribution:")
+            for region, count in titles['by_region'].items():
+                print(f"     {region}: {count}")
+            print(f"   Title ID prefixes:")
+            for prefix, count in titles['by_prefix'].items():
+                print(f"     {prefix}: {count}")
+            print(f"   Genres:")
+            for genre, count in titles['by_genre'].items():
+                print(f"     {genre}: {count}")
+
+        if 'updates' in stats:
+            updates = stats['updates']
+            print(f"\n📦 PS Vita Updates Statistics:")
+            print(f"   Titles checked: {updates['titles_checked']}")
+            for status, count in updates['by_status'].items():
+                print(f"     {status}: {count}")
+            print(f"   Packages: {updates['packages']} ({updates['unique_packages']} unique), {updates['total_mb'] / 1024:.1f} GB")
+            print(f"   Size percentiles (MB): " + ", ".join(f"{k}={v}" for k, v in updates['size_percentiles_mb'].items()))
+            print(f"   By region:")
+            for region, group in updates['by_region'].items():
+                print(f"     {region}: {group['packages']} packages, {group['total_mb'] / 1024:.1f} GB")
+            print(f"   By title ID prefix:")
+            for prefix, group in updates['by_prefix'].items():
+                print(f"     {prefix}: {group['packages']} packages, {group['total_mb'] / 1024:.1f} GB")
+            print(f"   Largest packages:")
+            for package in updates['largest_packages']:
+                print(f"     {package['media_id']} v{package['version']} - {package['size_mb']:.1f} MB - {package['title']}")
+
+        print(f"\n⏱️ Computed in {stats['elapsed_ms']} ms")
 
 TOTAL_EXPECTED_TITLES = 3000
 
@@ -655,9 +1760,10 @@ def print_menu():
     │ 4. 🔍 Search for PS Vita updates by Media ID               │
     │ 5. 🔗 Get update links for first 25 titles (test)         │
     │ 6. 📦 Get update links for ALL PS Vita titles (~3k)       │
-    │ 7. 📊 Show statistics from loaded data                     │
+    │ 7. 📊 Show statistics (titles + updates CSV)               │
     │ 8. 🧪 Test scraping on page 1 of PS Vita titles           │
-    │ 9. 🚪 Exit                                                 │
+    │ 9. 🔬 Probe PKG headers of update results (Range)         │
+    │ 0. 🚪 Exit                                                 │
     └─────────────────────────────────────────────────────────────┘
     """
     print(menu)
@@ -673,7 +1779,7 @@ def main():
     try:
         while True:
             print_menu()
-            choice = input("🎯 Choose an option (1-9): ").strip()
+            choice = input("🎯 Choose an option (0-9): ").strip()
 
             if choice == '1':
                 # Start full scraping
@@ -706,8 +1812,7 @@ def main():
             elif choice == '3':
                 # Load existing CSV
                 try:
-                    df = pd.read_csv('psvita_titles.csv')
-                    titles_data = df.to_dict('records')
+                    titles_data = load_titles_csv('psvita_titles.csv')
                     print(f"✅ Loaded {len(titles_data)} PS Vita titles from CSV")
                 except FileNotFoundError:
                     print("❌ psvita_titles.csv not found")
@@ -716,13 +1821,13 @@ def main():
                 # Single title search
                 media_id = input("🔍 Enter PS Vita Media ID (e.g., PCSE00000): ").strip().upper()
                 if media_id:
-                    result = downloader.process_single_title({
+                    result = downloader.process_single_title(TitleRecord.from_row({
                         'Media_ID': media_id,
                         'Title': 'Manual Search',
                         'Region': 'N/A',
                         'Genre': 'N/A'
-                    })
-                    print(f"\n📊 Result: {json.dumps(result, indent=2)}")
+                    }))
+                    print(f"\n📊 Result: {json.dumps(result.to_dict(), indent=2)}")
 
             elif choice == '5':
                 # Test with first 25 titles
@@ -752,20 +1857,12 @@ def main():
 
             elif choice == '7':
                 # Show statistics
-                if titles_data:
-                    total = len(titles_data)
-                    regions = {}
-                    for title in titles_data:
-                        region = title.get('Region', 'Unknown')
-                        regions[region] = regions.get(region, 0) + 1
-                    
-                    print(f"\n📊 PS Vita Titles Statistics:")
-                    print(f"   Total titles: {total}")
-                    print(f"   Regions distribution:")
-                    for region, count in sorted(regions.items()):
-                        print(f"     {region}: {count}")
-                else:
-                    print("❌ No data loaded")
+                if not os.path.exists('psvita_titles.csv') and not os.path.exists('psvita_updates_results.csv'):
+                    print("❌ No data found (psvita_titles.csv / psvita_updates_results.csv)")
+                    continue
+
+                statistics = PSVitaStatistics()
+                statistics.print_report(statistics.compute())
 
 
             elif choice == '8':
@@ -777,7 +1874,7 @@ def main():
                     if test_data:
                         print("📋 Sample titles:")
                         for i, title in enumerate(test_data[:5]):
-                            print(f"   {i+1}. {title['Media_ID']} - {title['Title']}")
+                            print(f"   {i+1}. {title.media_id} - {title.title}")
 
                         # Sauvegarder les données de test
                         save_option = input("📂 Voulez-vous sauvegarder ces résultats de test dans un CSV? (y/N): ")
@@ -790,15 +1887,147 @@ def main():
 
 
             elif choice == '9':
+                # Probe PKG headers
+                if not os.path.exists('psvita_updates_results.csv'):
+                    print("❌ psvita_updates_results.csv not found. Get update links first (option 5 or 6)")
+                    continue
+
+                probe = PSVitaPkgProbe()
+                probe.enrich_results_csv('psvita_updates_results.csv', 'psvita_updates_results_pkg.csv')
+
+            elif choice == '0':
                 print("👋 Goodbye!")
                 break
 
             else:
-                print("❌ Invalid choice. Please select 1-9.")
+                print("❌ Invalid choice. Please select 0-9.")
 
     finally:
         if scraper:
             scraper.close_driver()
 
+def parse_args(argv=None):
+    """Parse command line arguments (no command = interactive menu)"""
+    parser = argparse.ArgumentParser(description='PS Vita Titles Scraper & Update Tool')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Log every request (debug level)')
+    parser.add_argument('-q', '--quiet', action='store_true', help='Only show warnings and errors')
+    parser.add_argument('--log-file', help='Also write JSON-lines logs to this file')
+    subparsers = parser.add_subparsers(dest='command')
+
+    scrape_parser = subparsers.add_parser('scrape', help='Scrape PS Vita titles from Renascene')
+    scrape_parser.add_argument('--start-page', type=int, default=1, help='Resume from this page')
+    scrape_parser.add_argument('--max-pages', type=int, default=39, help='Last page to scrape')
+    scrape_parser.add_argument('--output', default='psvita_titles.csv', help='Titles CSV output')
+
+    batch_parser = subparsers.add_parser('batch', help='Get update links for titles in a CSV')
+    batch_parser.add_argument('--csv', default='psvita_titles.csv', help='Titles CSV input')
+    batch_parser.add_argument('--max-titles', type=int, help='Only process the first N titles')
+    batch_parser.add_argument('--workers', type=int, default=6, help='Workers for PKG header probing')
+    batch_parser.add_argument('--probe-headers', action='store_true', help='Probe PKG headers (Range requests)')
+
+    for stage_parser in (scrape_parser, batch_parser):
+        stage_parser.add_argument('--profile', nargs='?', const='psvita_profile', metavar='DIR',
+                                  help='Profile named stages, write pstats + collapsed stacks to DIR')
+        stage_parser.add_argument('--profile-top', type=int, default=25, help='Functions in the profile report')
+
+    download_parser = subparsers.add_parser('download', help='Download update packages from a results CSV')
+    download_parser.add_argument('--csv', default='psvita_updates_results.csv', help='Update results CSV input')
+    download_parser.add_argument('--order', choices=DOWNLOAD_ORDERS, default='smallest', help='Download order')
+    download_parser.add_argument('--latest-only', action='store_true', help='Only the latest version of each title')
+    download_parser.add_argument('--region', action='append', help='Only these regions (repeatable: --region US --region EU)')
+    download_parser.add_argument('--bandwidth', type=float, default=10.0, help='Expected MB/s for the ETA')
+    download_parser.add_argument('--output-dir', default='./psvita_titles_updates/', help='Download folder')
+    download_parser.add_argument('--dry-run', action='store_true', help='Only print the plan')
+
+    stats_parser = subparsers.add_parser('stats', help='Statistics over the titles and updates CSVs')
+    stats_parser.add_argument('--titles', default='psvita_titles.csv', help='Titles CSV')
+    stats_parser.add_argument('--updates', default='psvita_updates_results.csv', help='Update results CSV')
+    stats_parser.add_argument('--top', type=int, default=10, help='Largest packages / genres to list')
+    stats_parser.add_argument('--json', nargs='?', const='-', metavar='FILE',
+                              help='Write JSON instead of the report (stdout if no FILE)')
+
+    diff_parser = subparsers.add_parser('diff', help='Compare two update scans (psvita_updates_results.csv)')
+    diff_parser.add_argument('old_file', help='Previous scan CSV')
+    diff_parser.add_argument('new_file', help='Current scan CSV')
+    diff_parser.add_argument('--json', default='psvita_updates_diff.json', help='JSON report output')
+    diff_parser.add_argument('--csv', default='psvita_updates_diff.csv', help='CSV report output')
+    diff_parser.add_argument('--dedupe-unmatched', action='store_true',
+                             help='Also skip duplicate keys that exist only in the larger scan (uses more memory)')
+
+    return parser.parse_args(argv)
+
+def run_scrape(args):
+    """Non-interactive titles scraping"""
+    scraper = PSVitaTitlesScraper()
+    if not scraper.driver:
+        logger.error("❌ Cannot start scraping without Selenium")
+        return
+    try:
+        scraper.scrape_all_titles(max_pages=args.max_pages, start_page=args.start_page)
+        scraper.save_to_csv(args.output)
+    finally:
+        scraper.close_driver()
+
+def run_batch(args):
+    """Non-interactive update links batch"""
+    downloader = PSVitaUpdateDownloader()
+    downloader.batch_get_update_links(
+        csv_file=args.csv,
+        max_titles=args.max_titles,
+        max_workers=args.workers,
+        probe_headers=args.probe_headers
+    )
+
+def run_download(args):
+    """Plan and run scheduled package downloads"""
+    downloader = PSVitaUpdateDownloader(args.output_dir)
+    scheduler = PSVitaDownloadScheduler(
+        downloader,
+        order=args.order,
+        latest_only=args.latest_only,
+        regions=args.region,
+        bandwidth_mb=args.bandwidth
+    )
+    try:
+        scheduler.load_jobs(args.csv)
+    except FileNotFoundError:
+        logger.error(f"❌ {args.csv} not found")
+        return
+    scheduler.plan()
+    if not args.dry_run:
+        scheduler.run()
+
+def run_stats(args):
+    """Print or export statistics"""
+    statistics = PSVitaStatistics(args.titles, args.updates, top_n=args.top)
+    stats = statistics.compute()
+    if args.json == '-':
+        print(json.dumps(stats, indent=2, ensure_ascii=False))
+    elif args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(stats, f, indent=2, ensure_ascii=False)
+        logger.info(f"✅ Statistics saved to {args.json}")
+    else:
+        statistics.print_report(stats)
+
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    setup_logging(verbose=args.verbose, quiet=args.quiet, log_file=args.log_file)
+    if args.command in ('scrape', 'batch'):
+        profiler = StageProfiler(args.profile, top_n=args.profile_top).start() if args.profile else None
+        try:
+            if args.command == 'scrape':
+                run_scrape(args)
+            else:
+                run_batch(args)
+        finally:
+            if profiler:
+                profiler.stop()
+    elif args.command == 'download':
+        run_download(args)
+    elif args.command == 'stats':
+        run_stats(args)
+    elif args.command == 'diff':
+        PSVitaScanDiff(args.old_file, args.new_file, args.dedupe_unmatched).write_report(args.json, args.csv)
+    else:
+        main()